@@ -1,23 +1,301 @@
-# This file defines the PythonExecutorTool which executes Python code in an isolated environment.
+# This file defines the PythonExecutorTool which executes Python code in a worker interpreter or, when safe, in-process.
 import subprocess
-import tempfile
-import os
+import threading
+import faulthandler
+import traceback
+import atexit
+import signal
+import json
+import logging
+import warnings
+import ast
+import builtins
+import io
 import sys
-from typing import List, Dict, Any
+import types
+from contextlib import redirect_stdout, redirect_stderr, suppress
+from typing import List, Dict, Any, Iterable, Optional
 # Updated absolute import for base_tool
 from base_tool import BaseTool, ToolParameter, ParameterType
 
+# Source of the long-lived worker interpreter. It reads length-prefixed code payloads
+# from stdin, runs each one in a fresh __main__ module and answers with a length-prefixed
+# JSON frame {stdout, stderr, rc}. Imports stay cached in sys.modules between runs.
+WORKER_SRC = r'''
+import io, json, os, sys, tempfile, traceback, types
+# Bound once, so that executed code patching json.dumps cannot corrupt the protocol.
+dumps = json.dumps
+# Keep private handles on the protocol pipes so that the executed code and its child
+# processes cannot read from or write to them; fd 0 becomes /dev/null.
+proto_in = os.fdopen(os.dup(0), "rb")
+proto_out = os.fdopen(os.dup(1), "wb")
+saved_stderr = os.dup(2)
+os.dup2(os.open(os.devnull, os.O_RDONLY), 0)
+os.dup2(saved_stderr, 1)
+host_main = sys.modules["__main__"]
+# fd 1 and fd 2 go to these files during each run, so output from child processes is
+# captured too. They are created once and emptied before every run.
+out, err = tempfile.TemporaryFile(), tempfile.TemporaryFile()
+while True:
+    header = proto_in.read(4)
+    if len(header) < 4:
+        break
+    code = proto_in.read(int.from_bytes(header, "big")).decode()
+    for f in (out, err):
+        f.seek(0)
+        f.truncate()
+    os.dup2(out.fileno(), 1)
+    os.dup2(err.fileno(), 2)
+    sys.stdout = io.TextIOWrapper(open(1, "wb", buffering=0, closefd=False), encoding="utf-8", errors="backslashreplace", write_through=True)
+    sys.stderr = io.TextIOWrapper(open(2, "wb", buffering=0, closefd=False), encoding="utf-8", errors="backslashreplace", write_through=True)
+    sys.stdin = io.StringIO()
+    # A real __main__ module, so that classes defined by the code can be pickled
+    module = types.ModuleType("__main__")
+    sys.modules["__main__"] = module
+    rc = 0
+    try:
+        exec(compile(code, "<llm>", "exec"), module.__dict__)
+    except SystemExit as e:
+        if e.code is None or isinstance(e.code, int):
+            rc = e.code or 0
+        else:
+            print(e.code, file=sys.stderr)
+            rc = 1
+    except BaseException as e:
+        traceback.print_exception(type(e), e, e.__traceback__.tb_next)
+        rc = 1
+    sys.modules["__main__"] = host_main
+    sys.stdout.flush()
+    sys.stderr.flush()
+    sys.stdout, sys.stderr = sys.__stdout__, sys.__stderr__
+    # Between runs, stray output and crash diagnostics reach the agent's stderr
+    os.dup2(saved_stderr, 1)
+    os.dup2(saved_stderr, 2)
+    texts = []
+    for f in (out, err):
+        f.seek(0)
+        texts.append(f.read().decode("utf-8", "replace"))
+    payload = dumps({"stdout": texts[0], "stderr": texts[1], "rc": rc}).encode()
+    proto_out.write(len(payload).to_bytes(4, "big") + payload)
+    proto_out.flush()
+'''
+
+# Bound at import time: in-process code that patches json.loads cannot tamper with the
+# replies read from the worker.
+_json_loads = json.loads
+
+# Modules whose use could disturb the host process (process control, threads, signals,
+# event loops, raw memory, interpreter-wide state such as builtins, the recursion limit,
+# tracing or the garbage collector). Code importing any of them goes to the worker interpreter.
+DEFAULT_INPROC_BLOCKLIST = frozenset({
+    "os", "subprocess", "multiprocessing", "threading", "_thread", "concurrent",
+    "signal", "asyncio", "ctypes", "importlib", "shutil", "tkinter",
+    "builtins", "sys", "gc", "resource"
+})
+
+class _ExecutionTimeout(BaseException):
+    # Raised inside in-process code when its time budget is exhausted. Derives from
+    # BaseException so that an `except Exception` in the generated code cannot swallow it.
+    pass
+
+def _may_catch_timeout(node: ast.AST) -> bool:
+    # Whether this node could let the code catch _ExecutionTimeout: a bare `except:`, or
+    # any use of BaseException (except clauses, contextlib.suppress(BaseException)...).
+    if isinstance(node, ast.ExceptHandler):
+        return node.type is None
+    if isinstance(node, ast.Name):
+        return node.id == "BaseException"
+    if isinstance(node, ast.Attribute):
+        return node.attr == "BaseException"
+    return False
+
 class PythonExecutorTool(BaseTool):
     """
-    Tool for executing user-provided Python code in an isolated environment.
+    Tool for executing user-provided Python code, in a separate worker interpreter or,
+    for code that does not touch process-wide state, directly in the current process.
     """
-    def __init__(self):
+    __slots__ = ('inproc', 'inproc_blocklist', 'color', '_worker', '_lock')
+
+    def __init__(self, inproc: bool = True, inproc_blocklist: Optional[Iterable[str]] = None,
+                 color: Optional[bool] = None):
         # Initialize the PythonExecutorTool with its name and description.
+        # inproc selects the default path: in-process exec (fast) or the worker interpreter.
+        # color enables ANSI colors in the status lines; by default only on a terminal.
+        self.inproc = inproc and hasattr(signal, "setitimer")
+        self.color = sys.stdout.isatty() if color is None else color
+        self.inproc_blocklist = frozenset(inproc_blocklist if inproc_blocklist is not None else DEFAULT_INPROC_BLOCKLIST)
         super().__init__(
             name="execute_python",
-            description="Exécute du code Python et retourne le résultat. Le code est exécuté dans un environnement isolé."
+            description="Exécute du code Python et retourne le résultat. Le code est exécuté dans un interpréteur séparé, ou directement dans le processus courant lorsque c'est possible."
+        )
+        # Spawn the worker interpreter once; every execution reuses it instead of
+        # paying interpreter startup on each call.
+        self._worker = self._spawn_worker()
+        self._lock = threading.Lock()
+        atexit.register(self._stop_worker)
+        if self.inproc and not faulthandler.is_enabled():
+            # Generated code now shares our process: dump tracebacks if it crashes the interpreter.
+            faulthandler.enable()
+
+    def _spawn_worker(self) -> subprocess.Popen:
+        # Start a fresh worker interpreter running WORKER_SRC. Code reaches it over
+        # stdin, never through the filesystem; -I skips environment and user-site setup.
+        return subprocess.Popen(
+            [sys.executable, "-I", "-u", "-c", WORKER_SRC],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            # Inherited, so that a crashing worker's diagnostics are not lost
+            stderr=None,
+            # Keep the call eligible for subprocess's posix_spawn fast path (no fork of
+            # this process). Descriptors are non-inheritable by default, so nothing leaks.
+            close_fds=False
         )
 
+    @staticmethod
+    def _reap(worker: subprocess.Popen) -> int:
+        # Wait for a worker that exited or was killed, close its pipes and return its exit code.
+        return_code = worker.wait()
+        for pipe in (worker.stdin, worker.stdout):
+            with suppress(OSError):
+                pipe.close()
+        return return_code
+
+    def _stop_worker(self):
+        # Terminate the current worker and reap it.
+        with suppress(OSError):
+            self._worker.kill()
+        self._reap(self._worker)
+
+    def _execute_subprocess(self, code: str, timeout: int) -> Dict[str, Any]:
+        # Send one code payload to the worker and wait for its JSON answer.
+        # A timer kills the worker on timeout; a dead worker is replaced before returning.
+        # The lock serializes callers from different threads on the single worker pipe.
+        with self._lock:
+            worker = self._worker
+            timed_out = threading.Event()
+
+            def on_timeout():
+                timed_out.set()
+                worker.kill()
+
+            timer = threading.Timer(timeout, on_timeout)
+            timer.start()
+            reply = None
+            try:
+                payload = code.encode()
+                worker.stdin.write(len(payload).to_bytes(4, "big") + payload)
+                worker.stdin.flush()
+                header = worker.stdout.read(4)
+                if len(header) == 4:
+                    reply = _json_loads(worker.stdout.read(int.from_bytes(header, "big")))
+            except BrokenPipeError:
+                pass
+            finally:
+                timer.cancel()
+                # Wait for a timer that already fired, so timed_out is final below
+                timer.join()
+
+            if reply is not None and not timed_out.is_set():
+                return reply
+
+            # The worker died (timeout, crash or os._exit in the executed code), or the
+            # timer killed it just after it answered: respawn it.
+            return_code = self._reap(worker)
+            self._worker = self._spawn_worker()
+            if reply is not None:
+                return reply
+            if timed_out.is_set():
+                raise subprocess.TimeoutExpired(sys.executable, timeout)
+            return {"stdout": "", "stderr": "Le processus d'exécution s'est arrêté de manière inattendue", "rc": return_code}
+
+    def _parse_for_in_process(self, code: str) -> Optional[ast.Module]:
+        # Return the parsed code when it can safely run in-process, None otherwise.
+        # The fast path needs SIGALRM for its timeout, which only works on the main thread.
+        if not hasattr(signal, "setitimer") or threading.current_thread() is not threading.main_thread():
+            return None
+        try:
+            tree = ast.parse(code)
+        except SyntaxError:
+            # Let the worker report the syntax error.
+            return None
+        for node in ast.walk(tree):
+            if _may_catch_timeout(node):
+                # Code that could swallow the timeout exception runs where it can be killed.
+                return None
+            if isinstance(node, ast.Import):
+                modules = [alias.name for alias in node.names]
+            elif isinstance(node, ast.ImportFrom) and node.module:
+                modules = [node.module]
+            else:
+                continue
+            if any(module.split(".")[0] in self.inproc_blocklist for module in modules):
+                return None
+        return tree
+
+    def _execute_inproc(self, code: str, timeout: int) -> Optional[Dict[str, Any]]:
+        # Execute the code in this interpreter with captured stdio, or return None when it
+        # has to go to the worker instead. Once the budget is spent, an interval timer raises
+        # _ExecutionTimeout inside the code, again every 0.1 s until it gets out, and the run
+        # is reported as timed out even if the code managed to catch it.
+        tree = self._parse_for_in_process(code)
+        if tree is None:
+            return None
+        
+        out, err = io.StringIO(), io.StringIO()
+        rc = 0
+        # Run in a real __main__ module, so that classes defined by the code can be pickled
+        module = types.ModuleType("__main__")
+        previous_main, sys.modules["__main__"] = sys.modules["__main__"], module
+        timed_out = False
+
+        def on_alarm(signum, frame):
+            nonlocal timed_out
+            timed_out = True
+            raise _ExecutionTimeout()
+
+        previous_handler = signal.signal(signal.SIGALRM, on_alarm)
+        previous_stdin, sys.stdin = sys.stdin, io.StringIO()
+        # The code can still reach the builtins through __builtins__: restore them afterwards,
+        # along with the warning filters and the root logger (basicConfig is common)
+        saved_builtins = dict(builtins.__dict__)
+        root_logger = logging.getLogger()
+        saved_level, saved_handlers = root_logger.level, root_logger.handlers[:]
+        try:
+            with redirect_stdout(out), redirect_stderr(err), warnings.catch_warnings():
+                try:
+                    signal.setitimer(signal.ITIMER_REAL, timeout, 0.1)
+                    try:
+                        exec(compile(tree, "<llm>", "exec"), module.__dict__)
+                    finally:
+                        signal.setitimer(signal.ITIMER_REAL, 0)
+                except SystemExit as e:
+                    if e.code is None or isinstance(e.code, int):
+                        rc = e.code or 0
+                    else:
+                        print(e.code, file=sys.stderr)
+                        rc = 1
+                except Exception as e:
+                    traceback.print_exception(type(e), e, e.__traceback__.tb_next)
+                    rc = 1
+        except _ExecutionTimeout:
+            raise subprocess.TimeoutExpired("<llm>", timeout) from None
+        finally:
+            signal.signal(signal.SIGALRM, previous_handler)
+            sys.stdin = previous_stdin
+            sys.modules["__main__"] = previous_main
+            for name in builtins.__dict__.keys() - saved_builtins.keys():
+                del builtins.__dict__[name]
+            builtins.__dict__.update(saved_builtins)
+            root_logger.setLevel(saved_level)
+            root_logger.handlers[:] = saved_handlers
+        if timed_out:
+            raise subprocess.TimeoutExpired("<llm>", timeout)
+        return {"stdout": out.getvalue(), "stderr": err.getvalue(), "rc": rc}
+
+    def _say(self, text: str, ansi: str):
+        # Print a status line, wrapped in the given ANSI color code when colors are enabled.
+        print(f"\033[{ansi}m{text}\033[0m" if self.color else text)
+
     def _define_parameters(self) -> List[ToolParameter]:
         # Define the tool parameters including code to execute and optional timeout.
         return [
@@ -34,6 +312,20 @@ class PythonExecutorTool(BaseTool):
                 required=False,
                 default=10,
                 constraints={"min": 1, "max": 30}
+            ),
+            ToolParameter(
+                name="fast_path",
+                param_type=ParameterType.BOOLEAN,
+                description="Exécute le code directement dans le processus courant lorsque c'est possible",
+                required=False,
+                default=self.inproc
+            ),
+            ToolParameter(
+                name="verbose",
+                param_type=ParameterType.BOOLEAN,
+                description="Affiche les messages d'état et la sortie de l'exécution",
+                required=False,
+                default=True
             )
         ]
 
@@ -41,41 +333,36 @@ class PythonExecutorTool(BaseTool):
         # Retrieve provided parameters.
         code = kwargs.get('code')
         timeout = kwargs.get('timeout', 10)
+        fast_path = kwargs.get('fast_path', self.inproc)
+        # Callers running the tool off the main thread may print the result themselves
+        say = self._say if kwargs.get('verbose', True) else lambda text, ansi: None
 
-        # Create a temporary file to write the user-provided Python code.
-        with tempfile.NamedTemporaryFile(mode='w', suffix='.py', delete=False) as temp_file:
-            temp_file.write(code)
-            temp_file_path = temp_file.name
-
-        # Entertainment: print LLM thinking message in yellow.
-        print("\033[33mLLM is thinking...\033[0m")
-        print("\033[33mLLM is trying some code now...\033[0m")
+        # Entertainment: print LLM thinking message in yellow (when colors are enabled).
+        say("LLM is thinking...", "33")
+        say("LLM is trying some code now...", "33")
 
         try:
-            # Execute the temporary Python file using the current interpreter
-            process = subprocess.run(
-                [sys.executable, temp_file_path],
-                capture_output=True,
-                text=True,
-                timeout=timeout
-            )
+            # Run in-process when allowed, otherwise in the persistent worker interpreter
+            process = self._execute_inproc(code, timeout) if fast_path else None
+            if process is None:
+                process = self._execute_subprocess(code, timeout)
 
             # Entertainment: print execution output in green for stdout and red for stderr.
-            if process.stdout:
-                print("\033[32mOutput:\n" + process.stdout + "\033[0m")
-            if process.stderr:
-                print("\033[31mError:\n" + process.stderr + "\033[0m")
+            if process["stdout"]:
+                say("Output:\n" + process["stdout"], "32")
+            if process["stderr"]:
+                say("Error:\n" + process["stderr"], "31")
 
             result = {
-                "success": process.returncode == 0,
-                "output": process.stdout,
-                "error": process.stderr,
-                "return_code": process.returncode
+                "success": process["rc"] == 0,
+                "output": process["stdout"],
+                "error": process["stderr"],
+                "return_code": process["rc"]
             }
 
         except subprocess.TimeoutExpired:
             error_msg = f"L'exécution a dépassé le délai de {timeout} secondes"
-            print("\033[31m" + error_msg + "\033[0m")
+            say(error_msg, "31")
             result = {
                 "success": False,
                 "output": "",
@@ -83,19 +370,12 @@ class PythonExecutorTool(BaseTool):
                 "return_code": -1
             }
         except Exception as e:
-            print("\033[31mError: " + str(e) + "\033[0m")
+            say("Error: " + str(e), "31")
             result = {
                 "success": False,
                 "output": "",
                 "error": str(e),
                 "return_code": -1
             }
-        finally:
-            # Clean up the temporary file regardless of execution outcome.
-            try:
-                os.unlink(temp_file_path)
-            except:
-                # Ignoring cleanup errors.
-                pass
 
         return result
\ No newline at end of file
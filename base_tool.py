@@ -1,7 +1,8 @@
 from abc import ABC, abstractmethod
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Callable
 from dataclasses import dataclass
 from enum import Enum
+from types import MappingProxyType
 
 # Define parameter types with corresponding JSON schema information.
 class ParameterType(Enum):
@@ -28,7 +29,23 @@ class ParameterType(Enum):
         "type": "object"
     }
 
-@dataclass
+# Python types accepted for each parameter type.
+_TYPE_MAP = {
+    ParameterType.STRING: str,
+    ParameterType.INTEGER: int,
+    ParameterType.FLOAT: (int, float),
+    ParameterType.BOOLEAN: bool,
+    ParameterType.LIST: list,
+    ParameterType.DICT: dict
+}
+
+# Read-only JSON schema fragment for each parameter type, looked up directly by
+# get_schema instead of going through the enum's .value.
+_SCHEMA_BASE = MappingProxyType({
+    param_type: MappingProxyType(param_type.value) for param_type in ParameterType
+})
+
+@dataclass(slots=True)
 class ToolParameter:
     # Represents a single parameter for a tool.
     name: str
@@ -40,47 +57,71 @@ class ToolParameter:
 
 class BaseTool(ABC):
     # Base class for all tools providing parameter validation and schema generation.
+    # Subclasses declare __slots__ for their own attributes to keep instances dict-free.
+    __slots__ = ('name', 'description', 'parameters', '_schema', '_validator')
+
     def __init__(self, name: str, description: str):
         self.name = name
         self.description = description
         # Define the expected parameters using the abstract method.
         self.parameters: List[ToolParameter] = self._define_parameters()
+        # Schema built lazily by get_schema; parameters do not change after init.
+        self._schema: Optional[Dict[str, Any]] = None
+        # Validator specialized for these parameters, used by validate_parameters.
+        self._validator: Callable[[Dict[str, Any]], bool] = self._build_validator()
 
     @abstractmethod
     def _define_parameters(self) -> List[ToolParameter]:
         """Définit les paramètres requis pour l'outil"""
         pass
 
-    def validate_parameters(self, params: Dict[str, Any]) -> bool:
-        # Validate that all required parameters are present and match the expected types and constraints.
-        for param in self.parameters:
-            # Vérifier si les paramètres requis sont présents
-            if param.required and param.name not in params:
-                raise ValueError(f"Paramètre requis manquant: {param.name}")
+    def _build_validator(self) -> Callable[[Dict[str, Any]], bool]:
+        # Generate a validator function specialized for this tool's parameters: straight-line
+        # presence, isinstance and bound checks, with types and bounds bound as constants.
+        # It behaves exactly like the generic checks in _check_type/_validate_constraints.
+        namespace: Dict[str, Any] = {}
+        lines = ["def _validate(params):"]
+        for i, param in enumerate(self.parameters):
+            key = repr(param.name)
+            if param.required:
+                lines.append(f"    if {key} not in params:")
+                lines.append(f"        raise ValueError({'Paramètre requis manquant: ' + param.name!r})")
+                indent = "    "
+            else:
+                lines.append(f"    if {key} in params:")
+                indent = "        "
+            
+            namespace[f"_type{i}"] = _TYPE_MAP[param.param_type]
+            type_error = f"Type invalide pour {param.name}. Attendu: {param.param_type.value}"
+            lines.append(f"{indent}value = params[{key}]")
+            lines.append(f"{indent}if not isinstance(value, _type{i}):")
+            lines.append(f"{indent}    raise TypeError({type_error!r})")
             
-            # Vérifier le type si le paramètre est fourni
-            if param.name in params:
-                value = params[param.name]
-                if not self._check_type(value, param.param_type):
-                    raise TypeError(f"Type invalide pour {param.name}. Attendu: {param.param_type.value}")
-                
-                # Vérifier les contraintes si définies
-                if param.constraints:
-                    self._validate_constraints(param, value)
+            for constraint, constraint_value in (param.constraints or {}).items():
+                bound = f"_{constraint}{i}"
+                namespace[bound] = constraint_value
+                if constraint == "min":
+                    check, message = f"value < {bound}", f"{param.name} doit être >= {constraint_value}"
+                elif constraint == "max":
+                    check, message = f"value > {bound}", f"{param.name} doit être <= {constraint_value}"
+                elif constraint == "choices":
+                    check, message = f"value not in {bound}", f"{param.name} doit être parmi {constraint_value}"
+                else:
+                    continue
+                lines.append(f"{indent}if {check}:")
+                lines.append(f"{indent}    raise ValueError({message!r})")
+        lines.append("    return True")
         
-        return True
+        exec(compile("\n".join(lines), f"<validator {self.name}>", "exec"), namespace)
+        return namespace["_validate"]
+
+    def validate_parameters(self, params: Dict[str, Any]) -> bool:
+        # Validate that all required parameters are present and match the expected types and constraints.
+        return self._validator(params)
 
     def _check_type(self, value: Any, expected_type: ParameterType) -> bool:
         # Map ParameterType to actual Python types and validate the parameter's type.
-        type_mapping = {
-            ParameterType.STRING: str,
-            ParameterType.INTEGER: int,
-            ParameterType.FLOAT: (int, float),
-            ParameterType.BOOLEAN: bool,
-            ParameterType.LIST: list,
-            ParameterType.DICT: dict
-        }
-        return isinstance(value, type_mapping[expected_type])
+        return isinstance(value, _TYPE_MAP[expected_type])
 
     def _validate_constraints(self, param: ToolParameter, value: Any):
         # Validate the parameter value against any defined constraints.
@@ -99,33 +140,24 @@ class BaseTool(ABC):
                     raise ValueError(f"{param.name} doit être parmi {constraint_value}")
 
     def get_schema(self) -> Dict[str, Any]:
-        # Generate and return the OpenAI function schema for the tool.
-        properties = {}
-        required = []
+        # Generate and return the OpenAI function schema for the tool, cached after the first call.
+        if self._schema is not None:
+            return self._schema
         
+        properties = {}
         for param in self.parameters:
-            if isinstance(param.param_type.value, dict):
-                schema = param.param_type.value.copy()
-            else:
-                # Construct schema for basic types.
-                schema = {"type": param.param_type.value}
-            
-            schema["description"] = param.description
-            
-            if param.constraints:
-                if "min" in param.constraints:
-                    schema["minimum"] = param.constraints["min"]
-                if "max" in param.constraints:
-                    schema["maximum"] = param.constraints["max"]
-                if "choices" in param.constraints:
-                    schema["enum"] = param.constraints["choices"]
-            
-            properties[param.name] = schema
-            
-            if param.required:
-                required.append(param.name)
+            # One literal per parameter: base type schema, description, then any constraints.
+            constraints = param.constraints or {}
+            properties[param.name] = {
+                **_SCHEMA_BASE[param.param_type],
+                "description": param.description,
+                **({"minimum": constraints["min"]} if "min" in constraints else {}),
+                **({"maximum": constraints["max"]} if "max" in constraints else {}),
+                **({"enum": constraints["choices"]} if "choices" in constraints else {})
+            }
+        required = [param.name for param in self.parameters if param.required]
 
-        return {
+        self._schema = {
             "type": "function",
             "function": {
                 "name": self.name,
@@ -137,6 +169,7 @@ class BaseTool(ABC):
                 }
             }
         }
+        return self._schema
 
     @abstractmethod
     def execute(self, **kwargs) -> Dict[str, Any]:
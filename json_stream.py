@@ -0,0 +1,143 @@
+# This file defines JsonFieldStream which decodes one string field of a JSON reply while it streams in.
+from string import hexdigits
+from typing import Callable, Optional
+
+class JsonFieldStream:
+    """
+    Incremental decoder for one top-level string field of a streamed JSON object.
+
+    feed() takes the raw deltas; the decoded text of the field is passed to on_text as soon
+    as it is complete enough to decode (escapes may span deltas). Other fields, nested
+    objects and text inside their strings are skipped. Malformed escapes are passed through
+    as written instead of raising, so a bad reply never interrupts the stream.
+    """
+    _ESCAPES = {'n': '\n', 't': '\t', 'r': '\r', 'b': '\b', 'f': '\f', '"': '"', '\\': '\\', '/': '/'}
+
+    def __init__(self, field: str, on_text: Callable[[str], None]):
+        self.field = field
+        self._on_text = on_text
+        # Scanner state used until the field's value starts
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+        self._expect_key = False  # The next top-level string is a key
+        self._is_key = False  # The string being scanned is a top-level key
+        self._key = []  # Raw text of that key
+        self._stage = 0  # 1: the field's key was read, 2: its colon too
+        # Undecoded tail of the value (an escape split across deltas)
+        self._pending = ""
+        self.started = False  # The field's value has begun
+        self.done = False  # The value is complete, or is not a string
+
+    def feed(self, delta: str):
+        # Consume one delta of the raw reply.
+        if self.done:
+            return
+        if not self.started:
+            delta = self._seek(delta)
+            if delta is None:
+                return
+        self._decode(delta)
+
+    def _seek(self, text: str) -> Optional[str]:
+        # Scan for the field's key at depth 1. Returns the text following the opening
+        # quote of its value, or None when the value has not started yet.
+        for i, ch in enumerate(text):
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif ch == '\\':
+                    self._escaped = True
+                elif ch == '"':
+                    self._in_string = False
+                    if self._is_key and "".join(self._key) == self.field:
+                        self._stage = 1
+                    continue
+                if self._is_key:
+                    self._key.append(ch)
+            elif ch == '"':
+                if self._stage == 2:
+                    self.started = True
+                    return text[i + 1:]
+                self._in_string = True
+                self._is_key = self._depth == 1 and self._expect_key
+                self._expect_key = False
+                self._key = []
+            elif ch == ':' and self._stage == 1 and self._depth == 1:
+                self._stage = 2
+            elif ch.isspace():
+                continue
+            elif self._stage == 2:
+                # The field holds a number, null, an object...: there is nothing to stream
+                self.done = True
+                return None
+            else:
+                self._stage = 0
+                if ch in '{[':
+                    self._depth += 1
+                    self._expect_key = ch == '{' and self._depth == 1
+                elif ch in '}]':
+                    self._depth -= 1
+                elif ch == ',' and self._depth == 1:
+                    self._expect_key = True
+        return None
+
+    @staticmethod
+    def _hex(digits: str) -> Optional[int]:
+        # Value of exactly four hex digits, or None.
+        if len(digits) == 4 and all(c in hexdigits for c in digits):
+            return int(digits, 16)
+        return None
+
+    def _decode(self, text: str):
+        # Decode the value's text up to its closing quote and pass it on.
+        pending = self._pending + text
+        out = []
+        i, n = 0, len(pending)
+        while i < n:
+            ch = pending[i]
+            if ch == '"':
+                self.done = True
+                break
+            if ch != '\\':
+                out.append(ch)
+                i += 1
+                continue
+            if i + 1 >= n:
+                break  # The escape continues in the next delta
+            if pending[i + 1] != 'u':
+                out.append(self._ESCAPES.get(pending[i + 1], pending[i + 1]))
+                i += 2
+                continue
+            if i + 6 > n:
+                if all(c in hexdigits for c in pending[i + 2:]):
+                    break  # The escape continues in the next delta
+                out.append('\\u')  # Not a valid \u escape: keep it as written
+                i += 2
+                continue
+            code = self._hex(pending[i + 2:i + 6])
+            if code is None:
+                # Not a valid \u escape: keep it as written
+                out.append('\\u')
+                i += 2
+            elif 0xD800 <= code < 0xDC00:
+                # High surrogate: combine it with the low half that should follow
+                rest = pending[i + 6:i + 12]
+                if len(rest) < 6 and '\\u'.startswith(rest[:2]):
+                    break  # The low half may still be coming
+                low = self._hex(rest[2:]) if rest.startswith('\\u') else None
+                if low is not None and 0xDC00 <= low < 0xE000:
+                    out.append(chr(0x10000 + ((code - 0xD800) << 10) + (low - 0xDC00)))
+                    i += 12
+                else:
+                    out.append(pending[i:i + 6])  # Lone high surrogate
+                    i += 6
+            elif 0xDC00 <= code < 0xE000:
+                out.append(pending[i:i + 6])  # Lone low surrogate
+                i += 6
+            else:
+                out.append(chr(code))
+                i += 6
+        self._pending = pending[i:]
+        if out:
+            self._on_text("".join(out))
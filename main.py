@@ -1,118 +1,303 @@
 from Executor import PythonExecutorTool
-from openai import OpenAI
-import time
-from typing import Dict, Any, Optional
+from response_cache import ResponseCache
+from json_stream import JsonFieldStream
+import asyncio
+import sys
+from typing import Dict, Any, Optional, Tuple, Callable
 from dotenv import load_dotenv
-from termcolor import colored
-import textwrap
-import json
+import orjson
+from collections import Counter, deque
+from dataclasses import dataclass
 import re
 import os
 load_dotenv()
 
+# Prompts are laid out static-first: these constants never change between calls, and every
+# user message starts with a fixed preamble, with the per-call values appended after
+# DYNAMIC_MARKER. Identical prefixes let the provider reuse its prompt (KV) cache.
+SYSTEM_PROMPT_GEN = """You are a Python programmer. Analyze the problem technically, considering previous attempts and failures,
+then generate clean, efficient, and well-commented code based on that reasoning and the requirements.
+The code has to execute without asking for any user input.
+Follow these output guidelines:
+- Print a few  test results (like 1 or 2) in a clean, structured way
+- Avoid printing intermediate results unless necessary
+- If using assertions, catch AssertionError and print a clean summary
+- Format the output to be easily readable
+Return ONLY a JSON object with this exact structure (no other text):
+{
+    "reasoning": "your technical analysis and solution approach",
+    "code": "the raw Python code, without markdown formatting or ```python blocks"
+}"""
+
+SYSTEM_PROMPT_EVAL = """You are a lenient code reviewer focused mainly on functionality.
+If the code works and produces the expected output, consider it successful.
+Return ONLY a JSON object with this exact structure (no other text):
+{
+    "success": true/false,
+    "feedback": {
+        "technical_analysis": "one line summary",
+        "failure_points": [],
+        "suggestions": [],
+        "performance_notes": "one line if needed",
+        "edge_cases": []
+    }
+}"""
+
+DYNAMIC_MARKER = "\n---DYNAMIC---\n"
+USER_PREAMBLE_GEN = "Analyze the task below, taking the compressed history of previous attempts into account, and generate Python code that solves it."
+USER_PREAMBLE_EVAL = "Evaluate if the code below works as intended for the instruction, given its output."
+
+# Response parsing patterns, compiled once at import. Fence bodies are matched as "no ```
+# inside" (unrolled loop) so unterminated or nested fences cannot trigger heavy backtracking.
+_CODE_BLOCK_RE = re.compile(r'```(?:python)?\n?([^`]*(?:`(?!``)[^`]*)*)```')
+_JSON_BLOCK_RE = re.compile(r'```(?:json)?\n?([^`]*(?:`(?!``)[^`]*)*)```')
+
+# Output fragments that make a successful run look suspicious enough to ask the evaluator.
+_ERROR_MARKERS = ('Traceback', 'Error:', 'error:')
+
+# ANSI escape prefixes, precomputed instead of going through termcolor on every call
+_COLORS = {
+    'red': '\033[31m', 'green': '\033[32m', 'yellow': '\033[33m', 'blue': '\033[34m',
+    'magenta': '\033[35m', 'cyan': '\033[36m', 'white': '\033[97m'
+}
+_BOLD = '\033[1m'
+_RESET = '\033[0m'
+
+def paint(text: str, color: str, attrs: Optional[list] = None, enabled: bool = True) -> str:
+    """Colorize text with ANSI codes (bold when attrs is given), or return it unchanged when not enabled."""
+    if not enabled:
+        return text
+    prefix = _BOLD + _COLORS[color] if attrs else _COLORS[color]
+    return prefix + text + _RESET
+
+def _dumps(obj: Any) -> str:
+    """Serialize to indented JSON text for prompts, using orjson's C encoder."""
+    return orjson.dumps(obj, option=orjson.OPT_INDENT_2).decode()
+
+# Error recorded for an attempt whose generation reply holds no usable code.
+_NO_CODE_ERROR = "The model's reply did not contain usable code"
+
+@dataclass(slots=True)
+class Attempt:
+    """One recorded attempt: its code, execution error, LLM analysis and evaluator feedback."""
+    code: str
+    error: Optional[str]
+    llm_analysis: Optional[str]
+    feedback: Optional[dict]
+
 class CodeGeneratorEvaluator:
-    def __init__(self, api_key: str):
+    __slots__ = (
+        'client', 'gen_model', 'eval_model', 'extra_query_params', 'executor', 'cache',
+        'width', '_wrappers', '_last_preview', '_tty', 'verbose',
+        'last_feedback', 'attempt_history', '_attempt_context', 'last_error', 'last_llm_analysis',
+        'compressed_history', '_ctx_cached', '_ctx_dirty'
+    )
+
+    def __init__(self, api_key: str, verbose: bool = True, cache_path: Optional[str] = None):
         if not api_key:
             raise ValueError("API key cannot be empty")
         
-        self.client = OpenAI(
+        # Imported here so that importing this module (tests, scripts) stays cheap
+        from openai import AsyncOpenAI
+        import httpx
+        
+        # The client retries rate-limited (429) calls itself, honoring Retry-After,
+        # so attempts follow each other without a fixed pause. Requests share one pooled
+        # HTTP/2 connection, so concurrent calls are multiplexed instead of queued.
+        self.client = AsyncOpenAI(
             api_key=api_key,
             base_url="https://api.makehub.ai/v1",
+            http_client=httpx.AsyncClient(
+                http2=True,
+                timeout=60.0,
+                limits=httpx.Limits(max_keepalive_connections=20, max_connections=40)
+            )
         )
         
+        # Generation needs the large model; the evaluator only returns a small JSON verdict
+        self.gen_model = "meta/Llama-3.3-70B-Instruct-fp16"
+        self.eval_model = "meta/Llama-3.1-8B-Instruct"
+        
         self.extra_query_params = {
             "min_throughput": "150",
             "max_latency": "1000"
         }
 
 
-        self.executor = PythonExecutorTool()
+        self._tty = sys.stdout.isatty()  # Only colorize output for terminals
+        self.verbose = verbose  # Render framed previews; plain output otherwise
+        # The executor's status lines follow the same plain/colored choice
+        self.executor = PythonExecutorTool(color=self.pretty)
+        # Optional on-disk cache of completions for identical requests
+        self.cache = ResponseCache(cache_path) if cache_path else None
         self.width = 80  # Terminal width for text wrapping
-        self.last_feedback = None  # Store last technical feedback
+        self._wrappers = {}  # TextWrapper instances cached by width
+        self._last_preview = (None, [])  # (code, width, tty) key and rows of the last code preview
+        self.last_feedback = None  # Store last technical feedback (dict)
         self.attempt_history = []  # Store previous attempts
+        self._attempt_context = ""  # get_attempt_context text, extended by record_attempt
         self.last_error = None    # Store last error
         self.last_llm_analysis = None  # Store last LLM analysis
         self.compressed_history = {
             'attempts': 0,
-            'common_errors': set(),
-            'failed_approaches': [],
+            'common_errors': Counter(),
+            'failed_approaches': deque(maxlen=10),  # Only the 10 most recent approaches
             'last_attempt': None
         }
+        self._ctx_cached = ""  # Last get_compressed_context text
+        self._ctx_dirty = True  # Set whenever compressed_history changes
+
+    def get_wrapper(self, width: int):
+        """Return a TextWrapper for the given width, building it only once."""
+        wrapper = self._wrappers.get(width)
+        if wrapper is None:
+            # Only framed output wraps text, so quiet and headless runs never import textwrap
+            import textwrap
+            wrapper = self._wrappers[width] = textwrap.TextWrapper(width=width)
+        return wrapper
+
+    def paint(self, text: str, color: str, attrs: Optional[list] = None) -> str:
+        """Colorize text for the terminal, or return it unchanged for plain (non-TTY or quiet) output."""
+        return paint(text, color, attrs, self.pretty)
+
+    @property
+    def pretty(self) -> bool:
+        """Whether framed, wrapped output should be rendered."""
+        return self._tty and self.verbose
+
+    def emit(self, parts: list):
+        """Write a whole frame to stdout with a single write call."""
+        text = "".join(parts)
+        buffer = getattr(sys.stdout, 'buffer', None)
+        if buffer is None:
+            # Replaced stdout without a byte layer (e.g. io.StringIO)
+            sys.stdout.write(text)
+            sys.stdout.flush()
+            return
+        # Encode the frame once and bypass the text layer, after draining what print() left in it
+        sys.stdout.flush()
+        # 'replace': streamed model text may hold characters the terminal cannot encode
+        buffer.write(text.encode(sys.stdout.encoding or 'utf-8', 'replace'))
+        buffer.flush()
 
     def print_thinking(self, text: str, color: str = 'cyan'):
         """Print thinking process with nice formatting."""
-        print("\n" + "="*self.width)
-        print(colored("🤔 Thinking Process:", color, attrs=['bold']))
-        print("-"*self.width)
-        # Wrap text for better readability
-        wrapped_text = textwrap.fill(text, width=self.width-2)
-        print(wrapped_text)
-        print("="*self.width + "\n")
+        if not self.pretty:
+            self.emit([text, "\n"])
+            return
+        self.emit([
+            "\n", "="*self.width, "\n",
+            self.paint("🤔 Thinking Process:", color, attrs=['bold']), "\n",
+            "-"*self.width, "\n",
+            # Wrap text for better readability
+            self.get_wrapper(self.width-2).fill(text), "\n",
+            "="*self.width, "\n\n"
+        ])
+
+    def print_thinking_start(self, color: str = 'cyan'):
+        """Open the thinking box; the reasoning is then streamed into it as it arrives."""
+        if self.pretty:
+            self.emit([
+                "\n", "="*self.width, "\n",
+                self.paint("🤔 Thinking Process:", color, attrs=['bold']), "\n",
+                "-"*self.width, "\n"
+            ])
+
+    def print_thinking_end(self):
+        """Close the thinking box opened by print_thinking_start."""
+        self.emit(["\n", "="*self.width, "\n\n"] if self.pretty else ["\n"])
 
     def print_step(self, step: str, content: str, color: str = 'yellow'):
         """Print a step in the process with nice formatting."""
-        print(colored(f"\n▶ {step}:", color, attrs=['bold']))
-        print(textwrap.fill(content, width=self.width-2))
+        if not self.pretty:
+            self.emit([step, ": ", content, "\n"])
+            return
+        self.emit([
+            self.paint(f"\n▶ {step}:", color, attrs=['bold']), "\n",
+            self.get_wrapper(self.width-2).fill(content), "\n"
+        ])
 
-    def print_code_preview(self, code: str):
-        """Display code that will be executed in a nice box, with both formatted and clean versions."""
-        # Show formatted version with line numbers
-        print("\n" + "+"*self.width)
-        print(colored("📋 Code Preview (with line numbers):", 'blue', attrs=['bold']))
-        print("+"*self.width)
+    def numbered_rows(self, code: str) -> list:
+        """Render code as numbered preview rows, split at the box width, reusing the last rendering."""
+        key = (code, self.width, self._tty)
+        if self._last_preview[0] == key:
+            # Same code again (e.g. the final solution after its preview): skip the wrap pass
+            return self._last_preview[1]
         
+        rows = []
         lines = code.strip().split('\n')
         max_line_num_width = len(str(len(lines)))
+        W = self.width-max_line_num_width-4
+        continuation = ''.rjust(max_line_num_width)
         
         for i, line in enumerate(lines, 1):
             line_num = str(i).rjust(max_line_num_width)
-            wrapped_lines = textwrap.wrap(line, width=self.width-max_line_num_width-4)
-            for j, wrapped_line in enumerate(wrapped_lines):
-                if j == 0:
-                    print(colored(f"{line_num} │ {wrapped_line}", 'white'))
-                else:
-                    print(colored(f"{''.rjust(max_line_num_width)} │ {wrapped_line}", 'white'))
+            # Code is cut at the column limit, not word-wrapped: indentation and spacing stay intact
+            chunks = [line[k:k+W] for k in range(0, max(len(line), 1), W)]
+            for j, wrapped_line in enumerate(chunks):
+                prefix = line_num if j == 0 else continuation
+                rows.append(self.paint(f"{prefix} │ {wrapped_line}", 'white'))
+                rows.append("\n")
+        
+        self._last_preview = (key, rows)
+        return rows
+
+    def print_code_preview(self, code: str):
+        """Display code that will be executed in a nice box, with both formatted and clean versions."""
+        if not self.pretty:
+            # Headless or quiet: skip both renders and show the code once
+            self.emit([code.strip(), "\n"])
+            return
+        
+        # Show formatted version with line numbers
+        out = [
+            "\n", "+"*self.width, "\n",
+            self.paint("📋 Code Preview (with line numbers):", 'blue', attrs=['bold']), "\n",
+            "+"*self.width, "\n"
+        ]
+        
+        out += self.numbered_rows(code)
         
         # Show clean version for copying
-        print("\n" + "+"*self.width)
-        print(colored("📋 Clean Code (for copying):", 'green', attrs=['bold']))
-        print("+"*self.width)
-        print(code.strip())
-        print("+"*self.width + "\n")
+        out += [
+            "\n", "+"*self.width, "\n",
+            self.paint("📋 Clean Code (for copying):", 'green', attrs=['bold']), "\n",
+            "+"*self.width, "\n",
+            code.strip(), "\n",
+            "+"*self.width, "\n\n"
+        ]
+        self.emit(out)
 
     def record_attempt(self, code: str, error: str = None, llm_analysis: str = None):
         """Record an attempt with its associated data."""
-        self.attempt_history.append({
-            'code': code,
-            'error': error,
-            'llm_analysis': llm_analysis,
-            'feedback': self.last_feedback
-        })
+        attempt = Attempt(code, error, llm_analysis, self.last_feedback)
+        self.attempt_history.append(attempt)
+        # Format the new attempt once and extend the running context with it
+        block = self.format_attempt(len(self.attempt_history), attempt)
+        self._attempt_context = f"{self._attempt_context}\n{block}" if self._attempt_context else block
+
+    def format_attempt(self, number: int, attempt: Attempt) -> str:
+        """Render one recorded attempt for the attempt context."""
+        parts = [f"\nAttempt {number}:", f"Code:\n{attempt.code}"]
+        if attempt.error:
+            parts.append(f"Error:\n{attempt.error}")
+        if attempt.llm_analysis:
+            parts.append(f"Analysis:\n{attempt.llm_analysis}")
+        if attempt.feedback:
+            parts.append(f"Technical Feedback:\n{_dumps(attempt.feedback)}")
+        return "\n".join(parts)
 
     def get_attempt_context(self) -> str:
         """Generate context from previous attempts."""
-        if not self.attempt_history:
-            return ""
-        
-        context_parts = []
-        for i, attempt in enumerate(self.attempt_history, 1):
-            context_parts.append(f"\nAttempt {i}:")
-            context_parts.append(f"Code:\n{attempt['code']}")
-            if attempt['error']:
-                context_parts.append(f"Error:\n{attempt['error']}")
-            if attempt['llm_analysis']:
-                context_parts.append(f"Analysis:\n{attempt['llm_analysis']}")
-            if attempt['feedback']:
-                context_parts.append(f"Technical Feedback:\n{attempt['feedback']}")
-        
-        return "\n".join(context_parts)
+        return self._attempt_context
 
     def update_compressed_history(self, code: str, error: str = None, analysis: str = None, feedback: dict = None):
         """Maintain a compressed history of attempts."""
         self.compressed_history['attempts'] += 1
+        self._ctx_dirty = True
         
         if error:
-            self.compressed_history['common_errors'].add(error.split('\n')[0])  # Store just first line
+            self.compressed_history['common_errors'][error.split('\n')[0]] += 1  # Count by first line
         
         attempt_summary = {
             'code_snippet': code[:100] + '...' if len(code) > 100 else code,  # Store brief code sample
@@ -131,146 +316,171 @@ class CodeGeneratorEvaluator:
         }
 
     def get_compressed_context(self) -> str:
-        """Generate a concise context from compressed history."""
+        """Generate a concise context from compressed history (only the 5 most frequent errors)."""
+        # Serialize only when the history changed since the last call
+        if not self._ctx_dirty:
+            return self._ctx_cached
+        self._ctx_dirty = False
         if not self.compressed_history['attempts']:
+            self._ctx_cached = ""
             return ""
         
         context = f"""Previous Attempts Summary:
         Total Attempts: {self.compressed_history['attempts']}
-        Common Errors: {', '.join(self.compressed_history['common_errors'])}
+        Common Errors: {', '.join(f"{error} (x{count})" for error, count in self.compressed_history['common_errors'].most_common(5))}
         
         Last Attempt Details:
-        {json.dumps(self.compressed_history['last_attempt'], indent=2)}
+        {_dumps(self.compressed_history['last_attempt'])}
         
         Failed Approaches Summary:
-        {json.dumps(self.compressed_history['failed_approaches'], indent=2)}
+        {_dumps(list(self.compressed_history['failed_approaches']))}
         """
+        self._ctx_cached = context
         return context
 
-    def reason_about_solution(self, instruction: str) -> str:
-        """Think about the approach before generating code."""
+    async def stream_completion(self, messages: list, temperature: float,
+                                on_delta: Optional[Callable[[str], None]] = None,
+                                model: Optional[str] = None, json_mode: bool = False) -> str:
+        """Run a chat completion and return its text.
+
+        model defaults to the generation model; json_mode asks the server for a JSON object.
+        on_delta, when given, receives each chunk of text as soon as it arrives; the reply
+        is only streamed in that case.
+        When a response cache is configured, identical requests are answered from it.
+        """
+        request = {
+            "model": model or self.gen_model,
+            "messages": messages,
+            "temperature": temperature
+        }
+        if json_mode:
+            request["response_format"] = {"type": "json_object"}
+        cache_key = None
+        if self.cache is not None:
+            cache_key = self.cache.make_key(**request)
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                if on_delta:
+                    on_delta(cached)
+                return cached
+        
+        response = await self.client.chat.completions.create(
+            **request,
+            extra_query=self.extra_query_params,
+            stream=on_delta is not None
+        )
+        
+        if on_delta is None:
+            text = response.choices[0].message.content or ''
+        else:
+            buf = []
+            async for chunk in response:
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content or ''
+                buf.append(delta)
+                if delta:
+                    on_delta(delta)
+            text = "".join(buf)
+        if cache_key is not None:
+            self.cache.set(cache_key, text)
+        return text
+
+    async def plan_and_generate(self, instruction: str, live: bool = True) -> Tuple[str, str]:
+        """Reason about the approach and generate the code in a single request.
+
+        Returns the reasoning and the cleaned code, which is empty when the reply holds none.
+        With live, the reasoning field is written to the terminal while the reply streams in;
+        otherwise (concurrent calls) it is printed in one block once complete.
+        """
         self.print_step("Analyzing Problem", instruction, 'green')
         
         compressed_context = self.get_compressed_context()
         messages = [
-            {
-                "role": "system", 
-                "content": """You are a Python programmer. Analyze the problem technically, considering previous attempts and failures."""
-            },
-            {"role": "user", "content": f"""Technically analyze this problem and provide a detailed solution approach:
-            Task: {instruction}
-            
-            Compressed History:
-            {compressed_context}"""}
+            {"role": "system", "content": SYSTEM_PROMPT_GEN},
+            {"role": "user", "content": (
+                USER_PREAMBLE_GEN + DYNAMIC_MARKER +
+                f"Task: {instruction}\n\nCompressed History:\n{compressed_context}"
+            )}
         ]
         
-        response = self.client.chat.completions.create(
-            model="meta/Llama-3.3-70B-Instruct-fp16",
-            messages=messages,
-            extra_query=self.extra_query_params,
-            temperature=0.7
-        )
+        if live:
+            self.print_thinking_start()
+            reasoning_stream = JsonFieldStream('reasoning', lambda text: self.emit([text]))
+            raw_response = await self.stream_completion(messages, temperature=0.7, on_delta=reasoning_stream.feed, json_mode=True)
+        else:
+            raw_response = await self.stream_completion(messages, temperature=0.7, json_mode=True)
         
-        reasoning = response.choices[0].message.content
+        try:
+            plan = orjson.loads(self.clean_response(raw_response))
+            reasoning, code = str(plan.get('reasoning', '')), plan['code']
+            if isinstance(code, list):
+                # Some models send the code as a list of lines
+                code = "\n".join(map(str, code))
+            if not isinstance(code, str):
+                raise TypeError(f"code is {type(code).__name__}, not a string")
+            usable = True
+        except Exception:
+            # Never run the raw reply: the attempt is reported as failed instead
+            reasoning, code, usable = "", "", False
+        
+        if not live:
+            self.print_thinking(reasoning)
+        else:
+            if not reasoning_stream.started:
+                # The field was not recognized while streaming: show it now
+                self.emit([reasoning])
+            self.print_thinking_end()
+        if not usable:
+            self.print_step("Debug - Raw Generation Response", raw_response, 'red')
         self.last_llm_analysis = reasoning
-        self.print_thinking(reasoning)
+        return reasoning, self.clean_code(code)
+
+    async def reason_about_solution(self, instruction: str) -> str:
+        """Think about the approach before generating code (the generated code is discarded)."""
+        reasoning, _ = await self.plan_and_generate(instruction)
         return reasoning
 
     def clean_code(self, code: str) -> str:
         """Clean the code from markdown formatting and ensure it's executable."""
         # Remove markdown code blocks
-        code = re.sub(r'```(?:python)?\n?(.*?)```', r'\1', code, flags=re.DOTALL)
+        code = _CODE_BLOCK_RE.sub(r'\1', code)
         # Remove leading/trailing whitespace
         code = code.strip()
         return code
 
-    def generate_code(self, instruction: str) -> str:
-        """Generate Python code based on the instruction and reasoning."""
-        reasoning = self.reason_about_solution(instruction)
-        
-        self.print_step("Generating Code", "Based on the analysis, crafting solution...", 'blue')
-        messages = [
-            {
-                "role": "system", 
-                "content": """You are a Python programmer. Generate clean, efficient, and well-commented code based on the given reasoning and requirements. 
-                The code has to execute without asking for any user input.
-                Follow these output guidelines:
-                - Print a few  test results (like 1 or 2) in a clean, structured way
-                - Avoid printing intermediate results unless necessary
-                - If using assertions, catch AssertionError and print a clean summary
-                - Format the output to be easily readable
-                IMPORTANT: Do not include markdown formatting or ```python blocks. Provide only the raw Python code."""
-            },
-            {"role": "user", "content": f"Based on this reasoning:\n{reasoning}\n\nGenerate Python code that: {instruction}"}
-        ]
-        
-        response = self.client.chat.completions.create(
-            model="meta/Llama-3.3-70B-Instruct-fp16",
-            messages=messages,
-            extra_query=self.extra_query_params,
-            temperature=0.7
-        )
-        
-        return self.clean_code(response.choices[0].message.content)
+    async def generate_code(self, instruction: str) -> str:
+        """Generate Python code for the instruction, reasoning about it in the same request."""
+        _, code = await self.plan_and_generate(instruction)
+        return code
 
     def clean_response(self, text: str) -> str:
         """Clean the response text from markdown and other formatting."""
         # Remove markdown code blocks
-        text = re.sub(r'```(?:json)?\n?(.*?)```', r'\1', text, flags=re.DOTALL)
+        text = _JSON_BLOCK_RE.sub(r'\1', text)
         # Remove leading/trailing whitespace
         text = text.strip()
         return text
 
-    def evaluate_output(self, instruction: str, code: str, output: str) -> Dict[str, Any]:
+    async def evaluate_output(self, instruction: str, code: str, output: str) -> Dict[str, Any]:
         """Evaluate if the code output meets the requirements with technical feedback."""
         messages = [
-            {
-                "role": "system", 
-                "content": """You are a lenient code reviewer focused mainly on functionality. 
-                If the code works and produces the expected output, consider it successful.
-                Return ONLY a JSON object with this exact structure (no other text):
-                {
-                    "success": true/false,
-                    "feedback": {
-                        "technical_analysis": "one line summary",
-                        "failure_points": [],
-                        "suggestions": [],
-                        "performance_notes": "one line if needed",
-                        "edge_cases": []
-                    }
-                }"""
-            },
-            {"role": "user", "content": f"""
-Instruction: {instruction}
-Code:
-{code}
-Output:
-{output}
-
-Evaluate if this code works as intended."""}
+            {"role": "system", "content": SYSTEM_PROMPT_EVAL},
+            {"role": "user", "content": (
+                USER_PREAMBLE_EVAL + DYNAMIC_MARKER +
+                f"Instruction: {instruction}\nCode:\n{code}\nOutput:\n{output}"
+            )}
         ]
         
-        response = self.client.chat.completions.create(
-            model="meta/Llama-3.3-70B-Instruct-fp16",
-            messages=messages,
-            extra_query=self.extra_query_params,
-            temperature=0.3
-        )
-        
-        raw_response = response.choices[0].message.content
+        raw_response = await self.stream_completion(messages, temperature=0.3, model=self.eval_model, json_mode=True)
         
-        # Clean and extract just the JSON part
+        # The server enforces a JSON object; only strip a stray markdown fence before parsing
         try:
-            # Find JSON-like content between curly braces
-            json_match = re.search(r'\{[^{]*"success".*\}', raw_response, re.DOTALL)
-            if json_match:
-                eval_text = json_match.group(0)
-                evaluation = json.loads(eval_text)
-                if evaluation["success"]:
-                    return evaluation
-                self.last_feedback = json.dumps(evaluation["feedback"], indent=2)
+            evaluation = orjson.loads(self.clean_response(raw_response))
+            if evaluation["success"]:
                 return evaluation
-            raise ValueError("No valid JSON found in response")
+            self.last_feedback = evaluation["feedback"]
+            return evaluation
         except Exception as e:
             self.print_step("Debug - Raw Evaluation Response", raw_response, 'red')
             return {
@@ -284,43 +494,122 @@ Evaluate if this code works as intended."""}
                 }
             }
 
-    def iterative_code_generation(self, instruction: str, max_attempts: int = 3) -> Optional[str]:
-        """Iteratively generate and improve code until it meets requirements."""
+    def quick_evaluation(self, output: str) -> Optional[Dict[str, Any]]:
+        """Accept clean, non-empty output locally, without an evaluator call.
+
+        Returns a successful evaluation, or None when the output needs the LLM evaluator.
+        """
+        if not output.strip() or any(marker in output for marker in _ERROR_MARKERS):
+            return None
+        return {
+            "success": True,
+            "feedback": {
+                "technical_analysis": "Code ran cleanly and printed output (accepted without LLM evaluation)",
+                "failure_points": [],
+                "suggestions": [],
+                "performance_notes": "N/A",
+                "edge_cases": []
+            }
+        }
+
+    async def run_attempt(self, instruction: str) -> Tuple[str, Dict[str, Any], Optional[Dict[str, Any]]]:
+        """Generate, execute and evaluate one self-contained attempt.
+
+        Returns the code, the execution result and the evaluation (None when execution failed).
+        """
+        # Concurrent attempts share the terminal, so their reasoning is not streamed live
+        _, code = await self.plan_and_generate(instruction, live=False)
+        if code:
+            self.print_code_preview(code)
+            # Off the event loop so the other attempts keep streaming meanwhile. A cancelled
+            # attempt's thread runs on, so it must stay silent: the output is printed here.
+            result = await asyncio.to_thread(self.executor.execute, code=code, verbose=False)
+            if result['output'].strip():
+                self.print_step("Output", result['output'], 'cyan')
+        else:
+            result = {"success": False, "output": "", "error": _NO_CODE_ERROR, "return_code": -1}
+        if not result['success']:
+            self.print_step("Error", result['error'], 'red')
+            return code, result, None
+        evaluation = self.quick_evaluation(result['output'])
+        if evaluation is None:
+            evaluation = await self.evaluate_output(instruction, code, result['output'])
+        return code, result, evaluation
+
+    async def speculative_code_generation(self, instruction: str, max_attempts: int) -> Optional[str]:
+        """Run max_attempts independent attempts concurrently and keep the first successful one."""
+        tasks = [asyncio.create_task(self.run_attempt(instruction)) for _ in range(max_attempts)]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                code, result, evaluation = await next_done
+                if evaluation and evaluation['success']:
+                    print(self.paint("\n✨ Final Solution:", 'green', attrs=['bold']))
+                    self.print_code_preview(code)
+                    return code
+        finally:
+            # Drop the attempts still in flight once a winner is found
+            for task in tasks:
+                task.cancel()
+        
+        print(self.paint("\n❌ Max attempts reached without success", 'red', attrs=['bold']))
+        return None
+
+    async def iterative_code_generation(self, instruction: str, max_attempts: int = 3, speculative: bool = False) -> Optional[str]:
+        """Iteratively generate and improve code until it meets requirements.
+
+        With speculative=True, the attempts are instead run concurrently without sharing
+        feedback, trading extra API tokens for roughly one round of latency.
+        """
         self.compressed_history = {
             'attempts': 0,
-            'common_errors': set(),
-            'failed_approaches': [],
+            'common_errors': Counter(),
+            'failed_approaches': deque(maxlen=10),  # Only the 10 most recent approaches
             'last_attempt': None
         }
+        self._ctx_dirty = True
         self.attempt_history = []  # Reset history at start
+        self._attempt_context = ""
         self.last_feedback = None  # Reset feedback at start
-        print(colored("\n🔄 Starting Iterative Code Generation", 'magenta', attrs=['bold']))
+        if speculative:
+            print(self.paint(f"\n🔄 Starting {max_attempts} Speculative Attempts", 'magenta', attrs=['bold']))
+            return await self.speculative_code_generation(instruction, max_attempts)
+        print(self.paint("\n🔄 Starting Iterative Code Generation", 'magenta', attrs=['bold']))
         
         for attempt in range(max_attempts):
-            print(colored(f"\n📝 Attempt {attempt + 1}/{max_attempts}", 'magenta'))
+            print(self.paint(f"\n📝 Attempt {attempt + 1}/{max_attempts}", 'magenta'))
             
-            code = self.generate_code(instruction)
-            self.print_code_preview(code)
-            
-            clean_code = self.clean_code(code)
-            self.print_step("Executing Code...", "Running the generated code", 'cyan')
-            result = self.executor.execute(code=clean_code)
+            # Each attempt is planned only once the previous verdict is in the history,
+            # so evaluator feedback always reaches the next attempt
+            _, code = await self.plan_and_generate(instruction)
+            if code:
+                self.print_code_preview(code)
+                # plan_and_generate already returns cleaned code
+                self.print_step("Executing Code...", "Running the generated code", 'cyan')
+                result = self.executor.execute(code=code)
+            else:
+                # Nothing to run: count it as a failed execution so the next attempt is told why
+                result = {"success": False, "output": "", "error": _NO_CODE_ERROR, "return_code": -1}
+            success, output, error = result['success'], result['output'], result['error']
+            output_stripped = output.strip()
             
-            if result['output'].strip():  # Only print if there's actual output
-                self.print_step("Output", result['output'], 'cyan')
+            if output_stripped:  # Only print if there's actual output
+                self.print_step("Output", output, 'cyan')
             
-            if not result['success']:
-                self.last_error = result['error']
-                self.print_step("Error", result['error'], 'red')
-                self.record_attempt(code, error=result['error'], llm_analysis=self.last_llm_analysis)
+            if not success:
+                self.last_error = error
+                self.print_step("Error", error, 'red')
+                self.record_attempt(code, error=error, llm_analysis=self.last_llm_analysis)
                 self.update_compressed_history(
                     code=code,
-                    error=result['error'],
+                    error=error,
                     analysis=self.last_llm_analysis
                 )
                 continue
             
-            evaluation = self.evaluate_output(instruction, code, result['output'])
+            # A clean first run is accepted locally; anything else goes to the evaluator
+            evaluation = self.quick_evaluation(output_stripped) if attempt == 0 else None
+            if evaluation is None:
+                evaluation = await self.evaluate_output(instruction, code, output)
             self.update_compressed_history(
                 code=code,
                 analysis=self.last_llm_analysis,
@@ -340,31 +629,35 @@ Evaluate if this code works as intended."""}
                 )
             
             if evaluation['success']:
-                print(colored("\n✨ Final Solution:", 'green', attrs=['bold']))
+                print(self.paint("\n✨ Final Solution:", 'green', attrs=['bold']))
                 self.print_code_preview(code)  # Use the same preview format for final code
                 return code
-            
-            time.sleep(1)
         
-        print(colored("\n❌ Max attempts reached without success", 'red', attrs=['bold']))
+        print(self.paint("\n❌ Max attempts reached without success", 'red', attrs=['bold']))
         return None
 
 def main():
+    # BETTER_AUTOGPT_QUIET disables colors and framed output for scripted runs;
+    # BETTER_AUTOGPT_SPECULATIVE runs the attempts concurrently
+    quiet = bool(os.getenv('BETTER_AUTOGPT_QUIET'))
+    speculative = bool(os.getenv('BETTER_AUTOGPT_SPECULATIVE'))
+    color = not quiet and sys.stdout.isatty()
+    
     api_key = os.getenv('MAKEHUB_API_KEY')
     if not api_key:
-        print(colored("❌ Error: MAKEHUB_API_KEY environment variable is not set", 'red'))
+        print(paint("❌ Error: MAKEHUB_API_KEY environment variable is not set", 'red', enabled=color))
         print("Please set your API key in the .env file or environment variables")
         return
     
     try:
-        generator = CodeGeneratorEvaluator(api_key)
+        generator = CodeGeneratorEvaluator(api_key, verbose=not quiet, cache_path=os.getenv('BETTER_AUTOGPT_CACHE'))
         instruction = input("Enter your coding task: ")
-        final_code = generator.iterative_code_generation(instruction)
+        final_code = asyncio.run(generator.iterative_code_generation(instruction, speculative=speculative))
         
         if not final_code:
-            print(colored("\n⚠️ Failed to generate satisfactory code", 'yellow'))
+            print(paint("\n⚠️ Failed to generate satisfactory code", 'yellow', enabled=color))
     except Exception as e:
-        print(colored(f"\n❌ Error: {str(e)}", 'red'))
+        print(paint(f"\n❌ Error: {str(e)}", 'red', enabled=color))
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,33 @@
+# This file defines the ResponseCache which stores LLM completions on disk so identical requests skip the API.
+import atexit
+import hashlib
+import shelve
+from typing import Any, Optional
+
+import orjson
+
+class ResponseCache:
+    """
+    Persistent cache of chat completions keyed by the exact request that produced them.
+    """
+    def __init__(self, path: str):
+        # Open (or create) the shelve database and make sure it is flushed at exit.
+        self._db = shelve.open(path)
+        atexit.register(self.close)
+
+    @staticmethod
+    def make_key(**request: Any) -> str:
+        # Hash the canonical JSON form of the request (model, messages, sampling options...).
+        return hashlib.sha256(orjson.dumps(request, option=orjson.OPT_SORT_KEYS)).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        # Return the cached completion text, or None on a miss.
+        return self._db.get(key)
+
+    def set(self, key: str, text: str):
+        # Store a completion text under its request key.
+        self._db[key] = text
+
+    def close(self):
+        # Write pending entries and close the database; safe to call more than once.
+        self._db.close()
@@ -0,0 +1,83 @@
+# Tests for JsonFieldStream, the incremental decoder of the streamed "reasoning" field.
+import json
+import unittest
+
+from json_stream import JsonFieldStream
+
+def stream(parts, field="reasoning"):
+    # Feed the parts one by one and return the decoder and the text it emitted.
+    chunks = []
+    decoder = JsonFieldStream(field, chunks.append)
+    for part in parts:
+        decoder.feed(part)
+    return decoder, "".join(chunks)
+
+def splits(text):
+    # Every way of cutting text into two deltas, plus one character per delta.
+    yield [text]
+    for i in range(1, len(text)):
+        yield [text[:i], text[i:]]
+    yield list(text)
+
+class JsonFieldStreamTest(unittest.TestCase):
+    def assertStreams(self, text, expected):
+        for parts in splits(text):
+            decoder, emitted = stream(parts)
+            self.assertEqual(emitted, expected, parts)
+            self.assertTrue(decoder.done, parts)
+
+    def test_plain_value(self):
+        self.assertStreams('{"reasoning": "use a loop", "code": "print(1)"}', "use a loop")
+
+    def test_escapes_split_across_deltas(self):
+        value = 'line1\nline2\t"quoted" back\\slash a/b é'
+        self.assertStreams(json.dumps({"reasoning": value, "code": "x"}), value)
+
+    def test_surrogate_pair(self):
+        value = "emoji \U0001F600 done"
+        text = json.dumps({"reasoning": value, "code": "x"})
+        self.assertIn("\\ud83d\\ude00", text)
+        self.assertStreams(text, value)
+
+    def test_non_ascii_without_escapes(self):
+        value = "emoji \U0001F600 and é"
+        self.assertStreams(json.dumps({"reasoning": value}, ensure_ascii=False), value)
+
+    def test_key_inside_another_string_is_ignored(self):
+        code = 'x = {"reasoning": "not this"}\nprint("reasoning": "nor this")'
+        text = json.dumps({"code": code, "reasoning": "this one"})
+        self.assertStreams(text, "this one")
+
+    def test_key_in_nested_object_is_ignored(self):
+        text = '{"meta": {"reasoning": "inner"}, "list": ["reasoning", "x"], "reasoning": "outer"}'
+        self.assertStreams(text, "outer")
+
+    def test_key_used_as_value_is_ignored(self):
+        self.assertStreams('{"label": "reasoning", "reasoning": "real"}', "real")
+
+    def test_non_string_value_streams_nothing(self):
+        decoder, emitted = stream(['{"reasoning": null, "code": "x"}'])
+        self.assertEqual(emitted, "")
+        self.assertTrue(decoder.done)
+
+    def test_missing_field_streams_nothing(self):
+        decoder, emitted = stream(['{"code": "print(1)"}'])
+        self.assertEqual(emitted, "")
+        self.assertFalse(decoder.started)
+
+    def test_lone_high_surrogate_is_passed_through(self):
+        self.assertStreams('{"reasoning": "\\ud83d and more"}', "\\ud83d and more")
+
+    def test_lone_low_surrogate_is_passed_through(self):
+        self.assertStreams('{"reasoning": "a \\ude00 b"}', "a \\ude00 b")
+
+    def test_invalid_unicode_escape_is_passed_through(self):
+        self.assertStreams('{"reasoning": "bad \\uZZZZ here"}', "bad \\uZZZZ here")
+        self.assertStreams('{"reasoning": "short \\u12"}', "short \\u12")
+
+    def test_nothing_after_the_value_is_emitted(self):
+        decoder, emitted = stream(['{"reasoning": "done"', ', "code": "print(\\"x\\")"}'])
+        self.assertEqual(emitted, "done")
+
+if __name__ == "__main__":
+    unittest.main()